@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Burst benchmark for message ingest.
+
+Quiet chats each send a message every QUIET_INTERVAL seconds, while one chat
+floods the bot like a forwarding script. The benchmark prints the quiet chats'
+store-and-acknowledge latency with and without the flood, which should stay
+about the same, plus the ingest counters for the flooding chat.
+
+Runs against the real IngestController and ChatRepository with a temporary
+data file; only the Telegram side is faked.
+
+Usage: python scripts/ingest_burst_benchmark.py
+"""
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from storage.chat_repository import ChatRepository, STORAGE_KEY  # noqa: E402
+from helpers.ingest import IngestController  # noqa: E402
+
+DURATION = 3.0
+QUIET_CHATS = 5
+QUIET_INTERVAL = 0.1
+FLOOD_CHAT_ID = 1
+FLOOD_BURST = 2000
+FLOOD_RATE = 500  # Messages per second after the initial burst
+
+
+class FakeMessage:
+    def __init__(self, text: str):
+        self.text = text
+        self.submitted_at = time.perf_counter()
+        self.acked_at = None
+
+    async def reply_text(self, text: str, **kwargs):
+        self.acked_at = time.perf_counter()
+
+
+def make_update(chat_id: int, user_id: int, text: str):
+    return types.SimpleNamespace(
+        effective_chat=types.SimpleNamespace(id=chat_id),
+        effective_user=types.SimpleNamespace(id=user_id),
+        message=FakeMessage(text),
+    )
+
+
+async def quiet_chats(controller, messages: list):
+    deadline = time.perf_counter() + DURATION
+    i = 0
+    while time.perf_counter() < deadline:
+        for chat_id in range(100, 100 + QUIET_CHATS):
+            update = make_update(chat_id, chat_id, f"quiet {chat_id} {i}")
+            messages.append(update.message)
+            controller.submit(update)
+        i += 1
+        await asyncio.sleep(QUIET_INTERVAL)
+
+
+async def flood(controller):
+    deadline = time.perf_counter() + DURATION
+    for i in range(FLOOD_BURST):
+        controller.submit(make_update(FLOOD_CHAT_ID, FLOOD_CHAT_ID, f"flood {i}"))
+
+    i = FLOOD_BURST
+    while time.perf_counter() < deadline:
+        controller.submit(make_update(FLOOD_CHAT_ID, FLOOD_CHAT_ID, f"flood {i}"))
+        i += 1
+        await asyncio.sleep(1 / FLOOD_RATE)
+
+
+async def run_scenario(with_flood: bool) -> dict:
+    loop = asyncio.get_running_loop()
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = ChatRepository(str(Path(data_dir) / "messages.json"))
+        storage.load()
+        application = types.SimpleNamespace(bot_data={STORAGE_KEY: storage}, create_task=loop.create_task)
+        controller = IngestController(application)
+
+        messages = []
+        tasks = [quiet_chats(controller, messages)]
+        if with_flood:
+            tasks.append(flood(controller))
+        await asyncio.gather(*tasks)
+        await asyncio.sleep(0.1)  # Let the last batches flush
+
+        latencies = sorted(
+            (message.acked_at - message.submitted_at) * 1000 for message in messages if message.acked_at
+        )
+        return {
+            "acked": f"{len(latencies)}/{len(messages)}",
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+            "max_ms": latencies[-1],
+            "ingest_stats": controller.stats,
+            "flood_chat_stored": storage.get_message_count(FLOOD_CHAT_ID),
+        }
+
+
+def print_result(name: str, result: dict):
+    print(f"{name}:")
+    print(f"  quiet chats acked {result['acked']}, latency "
+          f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms max={result['max_ms']:.1f}ms")
+    print(f"  ingest counters {result['ingest_stats']}, flood chat stored {result['flood_chat_stored']}")
+
+
+def main():
+    print_result("Baseline (no flood)", asyncio.run(run_scenario(with_flood=False)))
+    print_result(f"Flood ({FLOOD_BURST} burst + {FLOOD_RATE}/s)", asyncio.run(run_scenario(with_flood=True)))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,21 +6,29 @@ This bot collects messages from a chat and randomly sends one back periodically
 as a reminder of things previously shared.
 """
 
+import time
+from helpers.startup_timer import StartupTimer
+
+startup_timer = StartupTimer(time.perf_counter())
+
 import os
 import asyncio
-from datetime import datetime, timedelta
 
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ConversationHandler
 from dotenv import load_dotenv
-from storage.chat_repository import storage
+from storage.chat_repository import ChatRepository, get_messages_file_path, get_storage, STORAGE_KEY
 from helpers.logger import setup_logger
 
 # Import handlers
-from handlers.command_handlers import start_command, stop_command, remind_command, list_command, delete_command, clear_command
+from handlers.command_handlers import start_command, stop_command, remind_command, list_command, delete_command, clear_command, profile_command, digest_command
 from handlers.schedule_handlers import schedule_command, handle_cron_input, cancel_cron, WAITING_FOR_CRON
 from handlers.message_handlers import handle_message
-from helpers.reminder_utils import send_random_reminder
-from helpers.time_utils import should_trigger_cron
+from helpers.outbox import drain_outbox
+from helpers.ingest import IngestController, INGEST_KEY, get_ingest_controller
+from helpers.time_utils import get_due_cron_slot
+from helpers.profiling import LoopLagWatchdog, tracking_handler
+
+import_time_ms = startup_timer.mark("imports")
 
 load_dotenv()
 
@@ -28,39 +36,84 @@ load_dotenv()
 CURRENT_DIR = os.path.dirname(__file__)
 logger = setup_logger(CURRENT_DIR)
 
+# Warn when module imports alone take longer than this
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+
+# Log the loop's stack when it is blocked longer than this; unset or 0 disables the watchdog
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "0"))
+
+# How often failed and leftover reminders are retried
+OUTBOX_DRAIN_INTERVAL_SECONDS = 15
+
 # Global variables
 application = None
 
 async def check_and_send_reminders(context):
     """Check all active chats and send reminders based on cron expressions."""
     try:
-        current_time = datetime.now()
-
-        for chat_key in storage.data.keys():
-            chat_id = int(chat_key)
-            
-            if not storage.get_chat_active_status(chat_id):
-                continue
-
-            # Get the cron expression for this chat
-            cron_expression = storage.get_chat_cron_expression(chat_id)
-            if not cron_expression:
-                # No cron expression set, skip this chat
-                continue
-
-            last_datetime = storage.get_last_reminder_datetime(chat_id)
-            
-            # Check if the cron should trigger
-            if should_trigger_cron(cron_expression, last_datetime):
-                await send_random_reminder(chat_id, application=context.application)
-                storage.set_last_reminder_datetime(chat_id, current_time)
-                logger.info(f"Sent reminder to chat {chat_id} based on cron: {cron_expression}")
-
+        with tracking_handler("check_and_send_reminders"):
+            await _check_and_send_reminders(context)
     except Exception as e:
         logger.error(f"Error in periodic reminders: {e}")
 
 
+async def _check_and_send_reminders(context):
+    storage = get_storage(context)
+
+    for chat_key in storage.data.keys():
+        chat_id = int(chat_key)
+
+        if not storage.get_chat_active_status(chat_id):
+            continue
+
+        # Get the cron expression for this chat
+        cron_expression = storage.get_chat_cron_expression(chat_id)
+        if not cron_expression:
+            # No cron expression set, skip this chat
+            continue
+
+        last_datetime = storage.get_last_reminder_datetime(chat_id)
+
+        # Queue the reminder if the cron should trigger; last_reminder_datetime advances once it is delivered
+        slot = get_due_cron_slot(cron_expression, last_datetime)
+        if slot and storage.enqueue_reminder(chat_id, slot):
+            logger.info(f"Queued reminder for chat {chat_id} based on cron: {cron_expression}")
+
+    await drain_outbox(context.application)
+
+
+async def send_queued_reminders(context):
+    """Retry queued reminders, including ones left over from before a restart."""
+    try:
+        with tracking_handler("send_queued_reminders"):
+            await drain_outbox(context.application)
+    except Exception as e:
+        logger.error(f"Error sending queued reminders: {e}")
+
+
+async def start_loop_lag_watchdog(application):
+    if LOOP_LAG_THRESHOLD_MS > 0:
+        watchdog = LoopLagWatchdog(LOOP_LAG_THRESHOLD_MS)
+        watchdog.start()
+        application.bot_data["loop_lag_watchdog"] = watchdog
+
+
+async def flush_ingest(application):
+    # Telegram already considers these updates handled, so store them before the bot goes away
+    await get_ingest_controller(application).flush_all()
+
+
+async def stop_loop_lag_watchdog(application):
+    watchdog = application.bot_data.get("loop_lag_watchdog")
+    if watchdog:
+        watchdog.stop()
+
+
 def main():
+    if import_time_ms > IMPORT_TIME_BUDGET_MS:
+        logger.warning(f"Imports took {import_time_ms:.1f}ms, over the {IMPORT_TIME_BUDGET_MS:.0f}ms budget")
+    startup_timer.mark("logging")
+
     token = os.getenv("BOT_TOKEN")
     if not token:
         logger.error("BOT_TOKEN environment variable is not set! Please create a .env file with your Telegram bot token.")
@@ -68,8 +121,24 @@ def main():
         print("📝 Create a .env file with: BOT_TOKEN=your_bot_token_here")
         print("🤖 Get your token from @BotFather on Telegram")
         return
-    
-    application = ApplicationBuilder().token(token).build()
+
+    storage = ChatRepository(get_messages_file_path())
+    storage.load()
+    queued_reminders = storage.get_outbox_size()
+    if queued_reminders:
+        logger.info(f"Replaying {queued_reminders} queued reminders from before the restart")
+    startup_timer.mark("storage")
+
+    application = (
+        ApplicationBuilder()
+        .token(token)
+        .post_init(start_loop_lag_watchdog)
+        .post_stop(flush_ingest)
+        .post_shutdown(stop_loop_lag_watchdog)
+        .build()
+    )
+    application.bot_data[STORAGE_KEY] = storage
+    application.bot_data[INGEST_KEY] = IngestController(application)
 
     # Create cron conversation handler
     cron_conv_handler = ConversationHandler(
@@ -88,9 +157,11 @@ def main():
     application.add_handler(CommandHandler("help", start_command))
     application.add_handler(CommandHandler("stop", stop_command))
     application.add_handler(CommandHandler("remind", remind_command))
+    application.add_handler(CommandHandler("digest", digest_command))
     application.add_handler(CommandHandler("list", list_command))
     application.add_handler(CommandHandler("delete", delete_command))
     application.add_handler(CommandHandler("clear", clear_command))
+    application.add_handler(CommandHandler("profile", profile_command))
     application.add_handler(cron_conv_handler)
     application.add_handler(
         MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
@@ -102,7 +173,14 @@ def main():
         interval=60,
         first=30
     )
-    
+    application.job_queue.run_repeating(
+        send_queued_reminders,
+        interval=OUTBOX_DRAIN_INTERVAL_SECONDS,
+        first=5
+    )
+    startup_timer.mark("application")
+    startup_timer.report(logger)
+
     logger.info("Bot started successfully!")
     application.run_polling()
 
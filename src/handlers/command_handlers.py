@@ -1,17 +1,28 @@
+from datetime import datetime
 from telegram import Update
 from telegram.ext import ContextTypes
-from storage.chat_repository import storage
+from storage.chat_repository import get_storage
 from helpers.logger import get_logger
 from helpers.reminder_utils import send_random_reminder
 from helpers.auth_wrapper import execute_with_authentication
+from helpers.profiling import profile_event_loop
+from helpers.message_rendering import escape_html
+from helpers.message_selection import parse_id_selection
 
 logger = get_logger()
 
+MAX_MESSAGES_SHOWN = 10
+MAX_DIGEST_SIZE = 50
+
+DEFAULT_PROFILE_SECONDS = 10
+MAX_PROFILE_SECONDS = 120
+
 
 @execute_with_authentication()
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /start command"""
     chat_id = update.effective_chat.id
+    storage = get_storage(context)
     
     storage.set_chat_active_status(chat_id, True)
 
@@ -26,9 +37,11 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/stop - Stop random reminders\n"
         "/remind - Get a random message now\n"
         "/schedule - Set reminder schedule\n"
+        "/digest <number> - Set how many messages each scheduled reminder sends\n"
         "/list - Show all stored messages\n"
-        "/delete <number> - Delete a specific message\n"
-        "/clear - Delete all stored messages"
+        "/delete <numbers> - Delete messages by number, range (3-40,55) or content\n"
+        "/clear - Delete all stored messages\n"
+        "/profile [seconds] - Profile the bot and get a flamegraph-compatible dump"
     )
 
     await update.message.reply_text(welcome_message)
@@ -39,6 +52,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def stop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /stop command"""
     chat_id = update.effective_chat.id
+    storage = get_storage(context)
     
     storage.set_chat_active_status(chat_id, False)
 
@@ -56,10 +70,43 @@ async def remind_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await send_random_reminder(chat_id, context.application)
 
 
+@execute_with_authentication()
+async def digest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle the /digest command - set how many messages each scheduled reminder sends"""
+    chat_id = update.effective_chat.id
+    storage = get_storage(context)
+
+    if not context.args:
+        await update.message.reply_text(
+            f"📬 Each scheduled reminder sends {storage.get_chat_digest_size(chat_id)} message(s).\n\n"
+            "Use /digest <number> to change it, e.g. /digest 5"
+        )
+        return
+
+    try:
+        digest_size = int(context.args[0])
+        if digest_size < 1 or digest_size > MAX_DIGEST_SIZE:
+            raise ValueError
+    except ValueError:
+        await update.message.reply_text(
+            f"❌ Invalid digest size! Please provide a number between 1 and {MAX_DIGEST_SIZE}.\n\n"
+            "Example: /digest 5"
+        )
+        return
+
+    if storage.set_chat_digest_size(chat_id, digest_size):
+        await update.message.reply_text(
+            f"✅ Each scheduled reminder will now send {digest_size} message{'s' if digest_size != 1 else ''}."
+        )
+    else:
+        await update.message.reply_text("❌ Error saving digest size. Please try again.")
+
+
 @execute_with_authentication()
 async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /list command - show all stored messages with numbers"""
     chat_id = update.effective_chat.id
+    storage = get_storage(context)
     
     messages = storage.get_all_messages(chat_id)
     
@@ -70,65 +117,105 @@ async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    message_list = "📝 **Stored Messages:**\n\n"
-    for i, message in enumerate(messages, 1):
+    message_list = "📝 <b>Stored Messages:</b>\n\n"
+    for message in messages:
         # Truncate long messages for display
-        display_message = message[:200] + "..." if len(message) > 200 else message
-        message_list += f"{i} - {display_message}\n\n"
+        text = message["text"]
+        display_message = text[:200] + "..." if len(text) > 200 else text
+        message_list += f"{message['id']} - {escape_html(display_message)}\n\n"
     
-    message_list += "🗑️ Use /delete <number> to delete a specific message"
+    message_list += "🗑️ Use /delete &lt;numbers&gt; to delete messages (e.g. /delete 3-40,55)"
     
-    await update.message.reply_text(message_list, parse_mode='Markdown')
+    await update.message.reply_text(message_list, parse_mode='HTML')
     logger.info(f"Listed {len(messages)} messages for chat {chat_id}")
 
 
 @execute_with_authentication()
 async def delete_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle the /delete command - delete a message by number"""
+    """Handle the /delete command - delete messages by number, range or content"""
     chat_id = update.effective_chat.id
+    storage = get_storage(context)
+    
+    if not context.args:
+        await update.message.reply_text(
+            "❌ Please tell me which messages to delete.\n\n"
+            "Examples:\n"
+            "• /delete 3\n"
+            "• /delete 3-40,55\n"
+            "• /delete some text - deletes messages containing it "
+            "(add confirm if more than one matches)\n\n"
+            "Use /list to see all messages with their numbers."
+        )
+        return
     
     try:
-        message_number = int(context.args[0])
-        message_index = message_number - 1 # Convert to 0-based index
+        args = context.args
+        confirmed = len(args) > 1 and args[-1].lower() == 'confirm'
+        selection = " ".join(args[:-1] if confirmed else args)
+        message_ids = parse_id_selection(selection)
         
-        # Get current messages to show what we're deleting
-        messages = storage.get_all_messages(chat_id)
+        if message_ids is None:
+            # Not numbers, so delete messages containing the text
+            query = selection.lower()
+            matches = [
+                message for message in storage.get_all_messages(chat_id)
+                if query in message["text"].lower()
+            ]
+            
+            # A short query can match most of the chat, so ask first like /clear does
+            if len(matches) > 1 and not confirmed:
+                reply = (
+                    f"⚠️ <b>{len(matches)} messages contain \"{escape_html(selection)}\":</b>\n\n"
+                    + _format_message_list(matches, 200)
+                    + f"\n\nTo delete them all, use: /delete {escape_html(selection)} confirm\n"
+                    "To cancel, just ignore this message."
+                )
+                await update.message.reply_text(reply, parse_mode='HTML')
+                return
+            
+            message_ids = {message["id"] for message in matches}
         
-        if message_index >= len(messages):
+        deleted = storage.delete_messages(chat_id, message_ids)
+        
+        if not deleted:
             await update.message.reply_text(
-                f"❌ Message number {message_number} doesn't exist.\n\n"
+                f"❌ No messages match \"{selection}\".\n\n"
                 "Use /list to see all messages with their numbers."
             )
             return
         
-        # Show what we're deleting
-        message_to_delete = messages[message_index]
-        display_message = message_to_delete[:500] + "..." if len(message_to_delete) > 500 else message_to_delete
-        
-        # Delete the message
-        success = storage.delete_message_by_index(chat_id, message_index)
+        # Show what we deleted
+        max_length = 500 if len(deleted) == 1 else 200
+        reply = (
+            f"🗑️ Deleted {len(deleted)} message{'s' if len(deleted) != 1 else ''}:\n\n"
+            + _format_message_list(deleted, max_length)
+        )
         
-        if success:
-            await update.message.reply_text(f"Deleted: _{display_message}_\n\n", parse_mode='Markdown')
-            logger.info(f"Deleted message {message_number} from chat {chat_id}")
-        else:
-            await update.message.reply_text("❌ Failed to delete message.")
+        await update.message.reply_text(reply, parse_mode='HTML')
+        logger.info(f"Deleted {len(deleted)} messages matching '{selection}' from chat {chat_id}")
 
-    except (ValueError, IndexError):
-        await update.message.reply_text(
-            "❌ Invalid message number! Please provide a valid number.\n\n"
-            "Example: /delete 3\n\n"
-            "Use /list to see all messages with their numbers."
-        )
     except Exception as e:
         await update.message.reply_text("❌ Error deleting message.")
         logger.error(f"Error deleting message for chat {chat_id}: {e}")
 
 
+def _format_message_list(messages: list, max_length: int) -> str:
+    """Format up to MAX_MESSAGES_SHOWN messages as HTML "id - text" lines."""
+    lines = []
+    for message in messages[:MAX_MESSAGES_SHOWN]:
+        text = message["text"]
+        display_message = text[:max_length] + "..." if len(text) > max_length else text
+        lines.append(f"{message['id']} - <i>{escape_html(display_message)}</i>")
+    if len(messages) > MAX_MESSAGES_SHOWN:
+        lines.append(f"...and {len(messages) - MAX_MESSAGES_SHOWN} more")
+    return "\n\n".join(lines)
+
+
 @execute_with_authentication()
 async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /clear command - delete all stored messages with confirmation"""
     chat_id = update.effective_chat.id
+    storage = get_storage(context)
     
     # Get current message count
     message_count = storage.get_message_count(chat_id)
@@ -160,3 +247,42 @@ async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"To cancel, just ignore this message.",
             parse_mode='Markdown'
         )
+
+
+@execute_with_authentication()
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle the /profile command - sample the bot for N seconds and send a flamegraph-compatible dump"""
+    chat_id = update.effective_chat.id
+
+    try:
+        seconds = int(context.args[0]) if context.args else DEFAULT_PROFILE_SECONDS
+        if seconds < 1 or seconds > MAX_PROFILE_SECONDS:
+            raise ValueError
+    except ValueError:
+        await update.message.reply_text(
+            f"❌ Invalid duration! Please provide a number of seconds between 1 and {MAX_PROFILE_SECONDS}.\n\n"
+            "Example: /profile 30"
+        )
+        return
+
+    await update.message.reply_text(f"🔬 Profiling for {seconds} seconds...")
+
+    async def run_profile():
+        try:
+            dump = await profile_event_loop(seconds)
+            if dump is None:
+                await context.bot.send_message(chat_id=chat_id, text="⏳ A profile is already running.")
+                return
+
+            await context.bot.send_document(
+                chat_id=chat_id,
+                document=dump.encode('utf-8'),
+                filename=f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded",
+                caption="🔥 Collapsed stacks, e.g. for flamegraph.pl or speedscope"
+            )
+            logger.info(f"Sent {seconds}s profile to chat {chat_id}")
+        except Exception as e:
+            logger.error(f"Error profiling for chat {chat_id}: {e}")
+
+    # Run in the background so updates keep being processed (and sampled) meanwhile
+    context.application.create_task(run_profile(), update=update)
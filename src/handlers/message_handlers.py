@@ -1,6 +1,6 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from storage.chat_repository import storage
+from helpers.ingest import get_ingest_controller
 from helpers.logger import get_logger
 from helpers.auth_wrapper import execute_with_authentication
 
@@ -13,10 +13,5 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not update.message or not update.message.text:
         return
 
-    chat_id = update.effective_chat.id
-    
-    result = storage.store_message(chat_id, update.message)
-    if result:
-        await update.message.reply_text("✅ Message stored successfully!")
-    else:
-        await update.message.reply_text("❌ Failed to store message.")
+    # Stored and acknowledged in a batch shortly after; don't block other chats' updates on it
+    get_ingest_controller(context).submit(update)
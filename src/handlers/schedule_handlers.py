@@ -1,9 +1,8 @@
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
-from storage.chat_repository import storage
+from storage.chat_repository import get_storage
 from helpers.logger import get_logger
 from helpers.auth_wrapper import execute_with_authentication
-from pyslop.cronslator import cronslate
 
 logger = get_logger()
 
@@ -15,6 +14,7 @@ WAITING_FOR_CRON = 1
 async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start the cron expression setting process."""
     chat_id = update.effective_chat.id
+    storage = get_storage(context)
     
     current_cron = storage.get_chat_cron_expression(chat_id)
     current_cron_text = storage.get_chat_cron_text(chat_id)
@@ -44,9 +44,13 @@ async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_cron_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the cron input from the user."""
     chat_id = update.effective_chat.id
+    storage = get_storage(context)
     cron_text = update.message.text.strip()
     
     try:
+        # Imported here so startup doesn't pay for it; only /schedule needs it
+        from pyslop.cronslator import cronslate
+
         # Parse natural language to cron expression using cronslate function
         cron_expression = cronslate(cron_text)
         
@@ -2,6 +2,7 @@ from functools import wraps
 from telegram import Update
 from telegram.ext import CallbackContext
 from helpers.logger import get_logger
+from helpers.profiling import tracking_handler
 import os
 
 logger = get_logger()
@@ -19,7 +20,8 @@ def execute_with_authentication():
                 return
             
             logger.info(f"Authorized access by user_id: {user_id}, chat_id: {chat_id}")
-            return await func(update, context)
+            with tracking_handler(func.__name__):
+                return await func(update, context)
         
         return wrapper
     return decorator
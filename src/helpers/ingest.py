@@ -0,0 +1,206 @@
+"""Admission control and micro-batching for incoming messages."""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+from telegram import Update
+from storage.chat_repository import get_storage
+from helpers.logger import get_logger
+
+logger = get_logger()
+
+INGEST_KEY = "ingest"
+
+# Messages per second and burst size allowed per chat and per user
+CHAT_RATE = 10
+CHAT_BURST = 50
+USER_RATE = 5
+USER_BURST = 30
+
+# Messages from a chat arriving within this window are stored in one transaction
+BATCH_WINDOW_SECONDS = 0.01
+
+# Over-limit messages wait in a per-chat backlog up to this size, then get shed
+MAX_BACKLOG_PER_CHAT = 200
+
+# Tell a chat at most this often that its messages are being dropped
+SHED_NOTICE_INTERVAL_SECONDS = 60
+
+ACCEPTED = "accepted"
+DEFERRED = "deferred"
+SHED = "shed"
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def has_token(self) -> bool:
+        self._refill()
+        return self.tokens >= 1
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def seconds_until_token(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class IngestController:
+    """Admits incoming messages per chat and per user, and stores each chat's messages in micro-batches."""
+
+    def __init__(self, application):
+        self.application = application
+        self.chat_buckets: Dict[int, TokenBucket] = {}
+        self.user_buckets: Dict[int, TokenBucket] = {}
+        self.pending: Dict[int, List[Update]] = defaultdict(list)
+        self.backlog: Dict[int, List[Update]] = defaultdict(list)
+        self._flush_scheduled = set()
+        self._backlog_scheduled = set()
+        self._last_shed_notice: Dict[int, float] = {}
+        self.stats = {ACCEPTED: 0, DEFERRED: 0, SHED: 0, "batches": 0}
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        if chat_id not in self.chat_buckets:
+            self.chat_buckets[chat_id] = TokenBucket(CHAT_RATE, CHAT_BURST)
+        return self.chat_buckets[chat_id]
+
+    def _user_bucket(self, user_id: int) -> TokenBucket:
+        if user_id not in self.user_buckets:
+            self.user_buckets[user_id] = TokenBucket(USER_RATE, USER_BURST)
+        return self.user_buckets[user_id]
+
+    def _try_admit(self, update: Update) -> bool:
+        chat_bucket = self._chat_bucket(update.effective_chat.id)
+        user_bucket = self._user_bucket(update.effective_user.id)
+        if not (chat_bucket.has_token() and user_bucket.has_token()):
+            return False
+        chat_bucket.take()
+        user_bucket.take()
+        return True
+
+    def submit(self, update: Update) -> str:
+        """Admit, defer or shed a message without waiting for it to be stored."""
+        chat_id = update.effective_chat.id
+
+        if not self.backlog.get(chat_id) and self._try_admit(update):
+            self._add_pending(chat_id, update)
+            result = ACCEPTED
+        elif len(self.backlog.get(chat_id, ())) < MAX_BACKLOG_PER_CHAT:
+            self.backlog[chat_id].append(update)
+            self._schedule_backlog(chat_id)
+            result = DEFERRED
+        else:
+            result = SHED
+            self._report_shed(update)
+
+        self.stats[result] += 1
+        return result
+
+    def _add_pending(self, chat_id: int, update: Update):
+        self.pending[chat_id].append(update)
+        if chat_id not in self._flush_scheduled:
+            self._flush_scheduled.add(chat_id)
+            self._call_later(BATCH_WINDOW_SECONDS, self._flush, chat_id)
+
+    def _schedule_backlog(self, chat_id: int):
+        if chat_id in self._backlog_scheduled:
+            return
+        self._backlog_scheduled.add(chat_id)
+        first = self.backlog[chat_id][0]
+        delay = max(
+            self._chat_bucket(chat_id).seconds_until_token(),
+            self._user_bucket(first.effective_user.id).seconds_until_token(),
+        )
+        self._call_later(delay, self._release_backlog, chat_id)
+
+    def _call_later(self, delay: float, callback, chat_id: int):
+        # Plain loop timers; the job queue is too coarse for a few milliseconds
+        asyncio.get_running_loop().call_later(
+            delay, lambda: self.application.create_task(callback(chat_id))
+        )
+
+    async def _release_backlog(self, chat_id: int):
+        """Move backlogged messages into the pending batch as tokens become available."""
+        self._backlog_scheduled.discard(chat_id)
+        backlog = self.backlog.get(chat_id)
+        if not backlog:
+            return
+
+        released = 0
+        while released < len(backlog) and self._try_admit(backlog[released]):
+            self._add_pending(chat_id, backlog[released])
+            released += 1
+        del backlog[:released]
+
+        if backlog:
+            self._schedule_backlog(chat_id)
+        else:
+            del self.backlog[chat_id]
+
+    async def _flush(self, chat_id: int):
+        self._flush_scheduled.discard(chat_id)
+        await self._store_batch(chat_id, self.pending.pop(chat_id, []))
+
+    async def flush_all(self):
+        """Store everything still pending or backlogged, ignoring rate limits. Called when the bot stops."""
+        chat_ids = set(self.pending) | set(self.backlog)
+        for chat_id in chat_ids:
+            # Timers that fire later find nothing left to do
+            self._flush_scheduled.discard(chat_id)
+            self._backlog_scheduled.discard(chat_id)
+            updates = self.pending.pop(chat_id, []) + self.backlog.pop(chat_id, [])
+            await self._store_batch(chat_id, updates)
+
+        if chat_ids:
+            logger.info(f"Flushed queued messages of {len(chat_ids)} chats before stopping")
+
+    async def _store_batch(self, chat_id: int, updates: List[Update]):
+        """Store the chat's messages with one dedup pass and one save, then acknowledge once."""
+        if not updates:
+            return
+
+        self.stats["batches"] += 1
+        storage = get_storage(self.application)
+        last_message = updates[-1].message
+        try:
+            stored = storage.store_messages(chat_id, [update.message.text for update in updates])
+            if stored is None:
+                await last_message.reply_text("❌ Failed to store message.")
+            elif len(updates) == 1:
+                await last_message.reply_text("✅ Message stored successfully!")
+            else:
+                await last_message.reply_text(f"✅ {len(updates)} messages stored successfully!")
+        except Exception as e:
+            logger.error(f"Error flushing {len(updates)} messages for chat {chat_id}: {e}")
+
+    def _report_shed(self, update: Update):
+        chat_id = update.effective_chat.id
+        now = time.monotonic()
+        if now - self._last_shed_notice.get(chat_id, float("-inf")) < SHED_NOTICE_INTERVAL_SECONDS:
+            return
+
+        self._last_shed_notice[chat_id] = now
+        logger.warning(
+            f"Shedding messages from chat {chat_id}, backlog full "
+            f"(accepted={self.stats[ACCEPTED]}, deferred={self.stats[DEFERRED]}, "
+            f"shed={self.stats[SHED] + 1}, batches={self.stats['batches']})"
+        )
+        self.application.create_task(
+            update.message.reply_text("⚠️ Too many messages at once, some of them weren't stored. Please slow down.")
+        )
+
+
+def get_ingest_controller(context) -> IngestController:
+    return context.bot_data[INGEST_KEY]
@@ -0,0 +1,136 @@
+"""Rendering of stored messages into Telegram HTML payloads."""
+
+import html
+import re
+from typing import Dict, List, Optional, Tuple
+
+REMINDER_TEMPLATE = '💭 <b>Random Reminder</b>\n\n"{text}"'
+PLAIN_REMINDER_TEMPLATE = '💭 Random Reminder\n\n"{text}"'
+DIGEST_HEADER = '💭 <b>Random Reminders</b>\n\n'
+DIGEST_ITEM_TEMPLATE = '"{text}"'
+DIGEST_ITEM_SEPARATOR = '\n\n'
+
+# Telegram's limit, counted in UTF-16 code units
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def escape_html(text: str) -> str:
+    return html.escape(text, quote=False)
+
+
+def html_to_plain(text: str) -> str:
+    """Strip our markup from an HTML payload; user text in it is escaped, so only our tags match."""
+    return html.unescape(re.sub(r'<[^>]+>', '', text))
+
+
+def breaks_legacy_markdown(text: str) -> bool:
+    """Whether Telegram would reject `text` under parse_mode='Markdown' (unbalanced entities)."""
+    return (
+        any(text.count(char) % 2 for char in ('*', '_', '`'))
+        or text.count('[') != text.count(']')
+    )
+
+
+def telegram_length(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _truncate(text: str, max_length: int) -> str:
+    """Truncate text to max_length UTF-16 units, ending with an ellipsis if anything was cut."""
+    if telegram_length(text) <= max_length:
+        return text
+
+    budget = max_length - 1  # Room for the ellipsis
+    end = used = 0
+    for char in text:
+        size = 2 if ord(char) > 0xFFFF else 1
+        if used + size > budget:
+            break
+        used += size
+        end += 1
+    return text[:end] + '…'
+
+
+def _truncate_escaped(text: str, max_length: int) -> str:
+    """Truncate escaped HTML to max_length UTF-16 units without cutting an entity like &amp; in half."""
+    if telegram_length(text) <= max_length:
+        return text
+
+    cut = _truncate(text, max_length)[:-1]
+    amp = cut.rfind('&')
+    if amp != -1 and ';' not in cut[amp:]:
+        cut = cut[:amp]
+    return cut + '…'
+
+
+def render_plain_reminder(text: str) -> str:
+    """Plain-text reminder for when Telegram rejects the HTML one, cut to fit in a single message."""
+    max_length = TELEGRAM_MESSAGE_LIMIT - telegram_length(PLAIN_REMINDER_TEMPLATE.format(text=''))
+    return PLAIN_REMINDER_TEMPLATE.format(text=_truncate(text, max_length))
+
+
+def split_digest(escaped_texts: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Render escaped messages as digest items under DIGEST_HEADER, starting a new message whenever `limit` would be exceeded."""
+    chunks = []
+    current = DIGEST_HEADER
+    current_has_items = False
+    separator_length = telegram_length(DIGEST_ITEM_SEPARATOR)
+    max_text_length = limit - telegram_length(DIGEST_HEADER) - telegram_length(DIGEST_ITEM_TEMPLATE.format(text=''))
+
+    for escaped in escaped_texts:
+        # Cut the text before quoting it so an oversized item keeps its closing quote
+        item = DIGEST_ITEM_TEMPLATE.format(text=_truncate_escaped(escaped, max_text_length))
+        extra = telegram_length(item) + (separator_length if current_has_items else 0)
+        if current_has_items and telegram_length(current) + extra > limit:
+            chunks.append(current)
+            current, current_has_items = DIGEST_HEADER, False
+        current += (DIGEST_ITEM_SEPARATOR if current_has_items else '') + item
+        current_has_items = True
+
+    if current_has_items:
+        chunks.append(current)
+    return chunks
+
+
+class RenderedMessageCache:
+    """Escaped reminder payloads, rendered once per stored message."""
+
+    def __init__(self):
+        # (chat_key, text) -> (reminder payload, escaped text, whether the raw text would have broken Markdown)
+        self._payloads: Dict[Tuple[str, str], Tuple[str, str, bool]] = {}
+        self.parse_failures_avoided = 0
+
+    def _get_entry(self, chat_id: int, text: str) -> Tuple[str, str, bool]:
+        key = (str(chat_id), text)
+        entry = self._payloads.get(key)
+        if entry is None:
+            escaped = escape_html(text)
+            # Long messages are cut so the reminder still fits in one Telegram message
+            max_length = TELEGRAM_MESSAGE_LIMIT - telegram_length(REMINDER_TEMPLATE.format(text=''))
+            entry = (
+                REMINDER_TEMPLATE.format(text=_truncate_escaped(escaped, max_length)),
+                escaped,
+                breaks_legacy_markdown(text),
+            )
+            self._payloads[key] = entry
+
+        if entry[2]:
+            self.parse_failures_avoided += 1
+        return entry
+
+    def get_reminder_payload(self, chat_id: int, text: str) -> str:
+        return self._get_entry(chat_id, text)[0]
+
+    def get_escaped_text(self, chat_id: int, text: str) -> str:
+        """Escaped text for digests, which split_digest quotes and fits into messages."""
+        return self._get_entry(chat_id, text)[1]
+
+    def invalidate(self, chat_id: int, text: Optional[str] = None):
+        """Drop the payload for one message, or for the whole chat if `text` is None."""
+        chat_key = str(chat_id)
+        if text is not None:
+            self._payloads.pop((chat_key, text), None)
+            return
+
+        for key in [key for key in self._payloads if key[0] == chat_key]:
+            del self._payloads[key]
@@ -0,0 +1,32 @@
+"""Parsing of message ID selections such as "3-40,55"."""
+
+import re
+from typing import List, Optional, Tuple
+
+ID_SELECTION_PART_PATTERN = re.compile(r'^\d+(-\d+)?$')
+
+
+class MessageIdRanges:
+    """Set of inclusive ID ranges, usable with `in` without expanding the ranges."""
+
+    def __init__(self, ranges: List[Tuple[int, int]]):
+        self.ranges = ranges
+
+    def __contains__(self, message_id: int) -> bool:
+        return any(start <= message_id <= end for start, end in self.ranges)
+
+
+def parse_id_selection(selection: str) -> Optional[MessageIdRanges]:
+    """Parse "3-40,55" or "3 4" into ID ranges; returns None if the selection isn't made of numbers and ranges."""
+    # Spaces around "-" and "," are ignored; any other space separates parts like a comma
+    normalized = re.sub(r'\s*([-,])\s*', r'\1', selection.strip())
+    parts = re.split(r'[\s,]', normalized)
+    if not all(ID_SELECTION_PART_PATTERN.match(part) for part in parts):
+        return None
+
+    ranges = []
+    for part in parts:
+        start, _, end = part.partition('-')
+        start, end = int(start), int(end or start)
+        ranges.append((min(start, end), max(start, end)))
+    return MessageIdRanges(ranges)
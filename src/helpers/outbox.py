@@ -0,0 +1,71 @@
+"""Delivery of queued reminders from the persisted outbox."""
+
+import asyncio
+from datetime import datetime, timedelta
+from telegram.error import BadRequest, Forbidden
+from storage.chat_repository import get_storage
+from helpers.logger import get_logger
+from helpers.reminder_utils import log_sent_reminder, render_reminder, send_html_with_fallback
+
+logger = get_logger()
+
+OUTBOX_BASE_BACKOFF_SECONDS = 30
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+OUTBOX_MAX_ATTEMPTS = 8
+
+# Errors that retrying can't fix, e.g. the bot was blocked or removed from the chat
+PERMANENT_SEND_ERRORS = (Forbidden, BadRequest)
+
+# Keeps the periodic drain and the one after enqueueing from sending the same entry twice
+_drain_lock = asyncio.Lock()
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: 30s, 60s, 120s, ... capped at an hour."""
+    return timedelta(seconds=min(OUTBOX_BASE_BACKOFF_SECONDS * 2 ** attempts, OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+async def drain_outbox(application):
+    """Send every due reminder in the outbox, rescheduling failed ones with backoff."""
+    async with _drain_lock:
+        storage = get_storage(application)
+
+        for chat_id, entry in storage.get_due_outbox_entries(datetime.now()):
+            # The chat may have been stopped since the reminder was queued
+            if not storage.get_chat_active_status(chat_id):
+                storage.complete_outbox_entry(chat_id, delivered=False)
+                continue
+
+            messages = entry.get("messages")
+            if messages is None:
+                # Pick once, so a retry resends the same messages instead of new random ones
+                messages = storage.get_random_messages(chat_id, storage.get_chat_digest_size(chat_id))
+                storage.update_outbox_delivery(chat_id, entry["key"], messages, 0)
+
+            parts = render_reminder(storage, chat_id, messages)
+            try:
+                # Parts sent before a failure are skipped, so a digest is never delivered twice
+                for index in range(entry.get("sent_parts", 0), len(parts)):
+                    html_text, plain_text = parts[index]
+                    await send_html_with_fallback(application.bot, chat_id, html_text, plain_text)
+                    storage.update_outbox_delivery(chat_id, entry["key"], messages, index + 1)
+            except PERMANENT_SEND_ERRORS as e:
+                logger.error(f"Giving up on reminder {entry['key']}, it can't be delivered: {e}")
+                storage.complete_outbox_entry(chat_id, delivered=False)
+            except Exception as e:
+                logger.error(f"Error sending reminder {entry['key']}: {e}")
+                _retry_later(storage, chat_id, entry)
+            else:
+                log_sent_reminder(storage, chat_id, messages)
+                storage.complete_outbox_entry(chat_id)
+
+
+def _retry_later(storage, chat_id: int, entry: dict):
+    attempts = entry["attempts"] + 1
+    if attempts >= OUTBOX_MAX_ATTEMPTS:
+        logger.error(f"Giving up on reminder {entry['key']} after {attempts} attempts")
+        storage.complete_outbox_entry(chat_id, delivered=False)
+    else:
+        retry_at = datetime.now() + get_retry_delay(entry["attempts"])
+        storage.reschedule_outbox_entry(chat_id, retry_at)
+        logger.warning(f"Reminder {entry['key']} failed (attempt {attempts}), retrying at {retry_at:%H:%M:%S}")
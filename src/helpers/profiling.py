@@ -0,0 +1,144 @@
+"""Sampling profiler and event-loop lag watchdog for the Random Reminder Bot."""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+from helpers.logger import get_logger
+
+logger = get_logger()
+
+# Handlers currently in flight, keyed by the id of the task running them
+_active_handlers: Dict[int, str] = {}
+
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def tracking_handler(name: str):
+    """Record `name` as running for the duration of the block so the watchdog can report it."""
+    task = asyncio.current_task()
+    key = id(task) if task else 0
+    _active_handlers[key] = name
+    try:
+        yield
+    finally:
+        _active_handlers.pop(key, None)
+
+
+def get_active_handlers() -> list:
+    try:
+        return sorted(set(_active_handlers.values()))
+    except RuntimeError:
+        # Dict changed while reading it; the loop isn't blocked anymore
+        return []
+
+
+def _collapse_stack(frame) -> str:
+    """Format a frame chain as a root-first, semicolon-separated stack (Brendan Gregg's folded format)."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks, one `stack count` line each."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[_collapse_stack(frame)] += 1
+
+
+async def profile_event_loop(seconds: float) -> Optional[str]:
+    """Sample the event loop thread for `seconds`; returns None if a profile is already running."""
+    if not _profile_lock.acquire(blocking=False):
+        return None
+
+    try:
+        profiler = SamplingProfiler(threading.get_ident())
+        profiler.start()
+        logger.info(f"Started sampling profiler for {seconds}s")
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            dump = profiler.stop()
+        logger.info(f"Sampling profiler collected {sum(profiler.samples.values())} samples")
+        return dump
+    finally:
+        _profile_lock.release()
+
+
+class LoopLagWatchdog:
+    """Logs the in-flight handlers and the loop's stack whenever the event loop is blocked too long."""
+
+    def __init__(self, threshold_ms: float):
+        self.threshold = threshold_ms / 1000
+        self.interval = self.threshold / 2
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._beat_handle = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start watching the running loop. Must be called from the loop thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop lag watchdog started (threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._beat_handle:
+            self._beat_handle.cancel()
+        if self._thread:
+            self._thread.join()
+
+    def _beat(self):
+        self._last_beat = time.monotonic()
+        self._beat_handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stop.wait(self.interval):
+            last_beat = self._last_beat
+            lag = time.monotonic() - last_beat - self.interval
+            if lag <= self.threshold or last_beat == reported_beat:
+                continue
+
+            # Report each stall once, while it is still happening
+            reported_beat = last_beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>\n"
+            handlers = ", ".join(get_active_handlers()) or "none"
+            logger.warning(
+                f"Event loop blocked for at least {lag * 1000:.0f}ms (handlers: {handlers})\n{stack}"
+            )
@@ -1,25 +1,60 @@
-from storage.chat_repository import storage
+from typing import List, Optional, Tuple
+from telegram.error import BadRequest
+from storage.chat_repository import get_storage
 from helpers.logger import get_logger
+from helpers.message_rendering import html_to_plain, render_plain_reminder, split_digest
 
 logger = get_logger()
 
+NO_MESSAGES_TEXT = "📭 No messages available yet! Send me some messages to get reminders."
 
-async def send_random_reminder(chat_id: int, application):
-    random_message = storage.get_random_message(chat_id)
-    
-    if not random_message:
-        reminder_text = "📭 No messages available yet! Send me some messages to get reminders."
-        log_message = "Sent 'no messages' notification"
-    else:
-        reminder_text = f'💭 **Random Reminder**\n\n"{random_message}"'
-        log_message = "Sent reminder"
+
+async def send_random_reminder(chat_id: int, application, count: int = 1) -> bool:
+    """Send one random message, or a digest of `count` distinct ones in as few messages as possible.
+
+    Returns whether Telegram accepted everything that was sent.
+    """
+    storage = get_storage(application)
+    messages = storage.get_random_messages(chat_id, count)
 
     try:
-        await application.bot.send_message(
-            chat_id=chat_id,
-            text=reminder_text,
-            parse_mode='Markdown'
-        )
-        logger.info(f"{log_message} to chat {chat_id}")
+        for html_text, plain_text in render_reminder(storage, chat_id, messages):
+            await send_html_with_fallback(application.bot, chat_id, html_text, plain_text)
+        log_sent_reminder(storage, chat_id, messages)
+        return True
     except Exception as e:
         logger.error(f"Error sending message to chat {chat_id}: {e}")
+        return False
+
+
+def render_reminder(storage, chat_id: int, messages: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """The (HTML, plain-text fallback) messages that make up a reminder of `messages`, a digest if there are several."""
+    if not messages:
+        return [(NO_MESSAGES_TEXT, None)]
+
+    if len(messages) == 1:
+        return [(storage.rendered.get_reminder_payload(chat_id, messages[0]), render_plain_reminder(messages[0]))]
+
+    escaped_texts = [storage.rendered.get_escaped_text(chat_id, message) for message in messages]
+    return [(chunk, html_to_plain(chunk)) for chunk in split_digest(escaped_texts)]
+
+
+def log_sent_reminder(storage, chat_id: int, messages: List[str]):
+    if not messages:
+        logger.info(f"Sent 'no messages' notification to chat {chat_id}")
+    else:
+        logger.info(
+            f"Sent reminder of {len(messages)} message(s) to chat {chat_id} "
+            f"({storage.rendered.parse_failures_avoided} Markdown parse failures avoided so far)"
+        )
+
+
+async def send_html_with_fallback(bot, chat_id: int, html_text: str, plain_text=None):
+    """Send `html_text` as HTML, retrying once as plain text if Telegram rejects the markup."""
+    try:
+        await bot.send_message(chat_id=chat_id, text=html_text, parse_mode='HTML')
+    except BadRequest as e:
+        if plain_text is None:
+            raise
+        logger.warning(f"Formatted message rejected for chat {chat_id}, sending as plain text: {e}")
+        await bot.send_message(chat_id=chat_id, text=plain_text)
@@ -0,0 +1,26 @@
+"""Startup phase timing for the Random Reminder Bot."""
+
+import time
+from typing import List, Optional, Tuple
+
+
+class StartupTimer:
+    def __init__(self, started_at: Optional[float] = None):
+        self._last = started_at if started_at is not None else time.perf_counter()
+        self._start = self._last
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> float:
+        """Record the time since the previous mark as `phase` and return it in ms."""
+        now = time.perf_counter()
+        elapsed_ms = (now - self._last) * 1000
+        self.phases.append((phase, elapsed_ms))
+        self._last = now
+        return elapsed_ms
+
+    def total_ms(self) -> float:
+        return (self._last - self._start) * 1000
+
+    def report(self, logger):
+        phases = ", ".join(f"{phase}={elapsed_ms:.1f}ms" for phase, elapsed_ms in self.phases)
+        logger.info(f"Startup timings: {phases} (total {self.total_ms():.1f}ms)")
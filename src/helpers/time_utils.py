@@ -8,7 +8,8 @@ from croniter import croniter
 logger = logging.getLogger(__name__)
 
 
-def should_trigger_cron(cron_expression: str, last_reminder: Optional[datetime] = None) -> bool:
+def get_due_cron_slot(cron_expression: str, last_reminder: Optional[datetime] = None) -> Optional[datetime]:
+    """Get the latest cron occurrence that is due since last_reminder, or None if nothing is due."""
     try:
         current_time = datetime.now()
         
@@ -18,20 +19,20 @@ def should_trigger_cron(cron_expression: str, last_reminder: Optional[datetime]
             prev_time = cron.get_prev(datetime)
             
             # If the previous occurrence was within the last minute, trigger
-            return current_time - prev_time <= timedelta(minutes=1)
+            return prev_time if current_time - prev_time <= timedelta(minutes=1) else None
         
         # If we have a last reminder time, check if next scheduled time has passed
         cron = croniter(cron_expression, last_reminder)
         next_time = cron.get_next(datetime)
+        if current_time < next_time:
+            return None
         
-        return current_time >= next_time
+        # Missed occurrences collapse into the most recent one
+        return max(next_time, croniter(cron_expression, current_time).get_prev(datetime))
         
     except ValueError as e:
         logger.error(f"Invalid cron expression '{cron_expression}': {e}")
-        return False
+        return None
     except Exception as e:
         logger.error(f"Error checking cron trigger for '{cron_expression}': {e}")
-        return False
-
-
-
+        return None
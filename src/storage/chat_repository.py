@@ -1,21 +1,44 @@
 import os
 import random
 import json
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
-from telegram import Message
+from typing import Container, Dict, List, Optional
 from helpers.logger import get_logger
+from helpers.message_rendering import RenderedMessageCache
 
 logger = get_logger()
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+STORAGE_KEY = "storage"
 
 
 class ChatRepository:
     def __init__(self, json_file_path: str):
         self.json_file = json_file_path
-        self.data = self._load_data()
+        self._data = None
+        self.rendered = RenderedMessageCache()
+
+    @property
+    def data(self) -> Dict:
+        """Chat data, read from disk on first access if load() wasn't called."""
+        if self._data is None:
+            self.load()
+        return self._data
+
+    @data.setter
+    def data(self, value: Dict):
+        self._data = value
+
+    def load(self):
+        """Read the JSON file into memory."""
+        started = time.perf_counter()
+        self._data = self._load_data()
+        if self._migrate_message_ids():
+            self._save_data()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Loaded {len(self._data)} chats from {self.json_file} in {elapsed_ms:.1f}ms")
 
     def _load_data(self) -> Dict:
         try:
@@ -27,6 +50,24 @@ class ChatRepository:
             logger.error(f"Error loading data from JSON: {e}")
             return {}
 
+    def _migrate_message_ids(self) -> bool:
+        """Give stable IDs to messages stored as plain strings by older versions."""
+        migrated = False
+        for chat_key, chat_data in self._data.items():
+            messages = chat_data.get("messages", [])
+            if any(isinstance(message, str) for message in messages):
+                chat_data["messages"] = [
+                    {"id": i, "text": message} if isinstance(message, str) else message
+                    for i, message in enumerate(messages, 1)
+                ]
+                migrated = True
+            if "next_message_id" not in chat_data:
+                chat_data["next_message_id"] = max((m["id"] for m in chat_data.get("messages", [])), default=0) + 1
+                migrated = True
+        if migrated:
+            logger.info("Migrated stored messages to stable message IDs")
+        return migrated
+
     def _save_data(self):
         try:
             with open(self.json_file, 'w', encoding='utf-8') as f:
@@ -40,49 +81,59 @@ class ChatRepository:
         if chat_key not in self.data:
             self.data[chat_key] = {
                 "messages": [],
+                "next_message_id": 1,
                 "active": True,
                 "last_reminder_datetime": None,
                 "cron_expression": None,
-                "cron_text": None
+                "cron_text": None,
+                "digest_size": 1,
+                "outbox": []
             }
 
-    def store_message(self, chat_id: int, message: Message):
+    def store_messages(self, chat_id: int, texts: List[str]) -> Optional[int]:
+        """Store new texts with a single dedup pass and a single save. Returns how many were new, or None on error."""
         try:
             chat_key = str(chat_id)
 
             self._ensure_chat_data(chat_id)
 
-            if message.text in self.data[chat_key]["messages"]:
-                return True  # Message already exists
+            chat_data = self.data[chat_key]
+            existing = {m["text"] for m in chat_data["messages"]}
+            stored = 0
+            for text in texts:
+                if text in existing:
+                    continue  # Message already exists
 
-            self.data[chat_key]["messages"].append(message.text)
-            self._save_data()
+                chat_data["messages"].append({"id": chat_data["next_message_id"], "text": text})
+                chat_data["next_message_id"] += 1
+                existing.add(text)
+                stored += 1
 
-            logger.info(f"Stored message from chat {chat_id}: {message.text[:50]}...")
+            if stored:
+                self._save_data()
+                logger.info(f"Stored {stored} messages from chat {chat_id}: {texts[-1][:50]}...")
 
-            return True
+            return stored
 
         except Exception as e:
-            logger.error(f"Error storing message: {e}")
-            return False
+            logger.error(f"Error storing messages: {e}")
+            return None
 
-    def get_random_message(self, chat_id: int) -> Optional[str]:
+    def get_random_messages(self, chat_id: int, count: int) -> List[str]:
+        """Pick up to `count` distinct random messages; random.sample doesn't copy the list for small counts."""
         try:
             chat_key = str(chat_id)
 
             if chat_key not in self.data:
-                return None
+                return []
 
             messages = self.data[chat_key].get("messages", [])
-
-            if not messages:
-                return None
-
-            return random.choice(messages)
+            picked = random.sample(messages, min(count, len(messages)))
+            return [message["text"] for message in picked]
 
         except Exception as e:
-            logger.error(f"Error getting random message: {e}")
-            return None
+            logger.error(f"Error getting random messages: {e}")
+            return []
 
     def get_chat_active_status(self, chat_id: int) -> bool:
         try:
@@ -142,7 +193,8 @@ class ChatRepository:
             logger.error(f"Error setting last reminder datetime: {e}")
             return False
 
-    def get_all_messages(self, chat_id: int) -> list:
+    def get_all_messages(self, chat_id: int) -> List[Dict]:
+        """Get the chat's messages as {"id", "text"} dicts, oldest first."""
         try:
             chat_key = str(chat_id)
             
@@ -155,28 +207,32 @@ class ChatRepository:
             logger.error(f"Error getting all messages: {e}")
             return []
 
-    def delete_message_by_index(self, chat_id: int, index: int) -> bool:
-        """Delete a message by its index (0-based)."""
+    def delete_messages(self, chat_id: int, message_ids: Container[int]) -> List[Dict]:
+        """Delete every message whose ID is in message_ids with a single save. Returns the deleted messages."""
         try:
             chat_key = str(chat_id)
             
             if chat_key not in self.data:
-                return False
+                return []
             
-            messages = self.data[chat_key].get("messages", [])
+            kept, deleted = [], []
+            for message in self.data[chat_key].get("messages", []):
+                (deleted if message["id"] in message_ids else kept).append(message)
             
-            if index < 0 or index >= len(messages):
-                return False
+            if not deleted:
+                return []
             
-            deleted_message = messages.pop(index)
+            self.data[chat_key]["messages"] = kept
             self._save_data()
+            for message in deleted:
+                self.rendered.invalidate(chat_id, message["text"])
             
-            logger.info(f"Deleted message {index + 1} from chat {chat_id}: {deleted_message[:50]}...")
-            return True
+            logger.info(f"Deleted {len(deleted)} messages from chat {chat_id}: {[m['id'] for m in deleted]}")
+            return deleted
             
         except Exception as e:
-            logger.error(f"Error deleting message by index: {e}")
-            return False
+            logger.error(f"Error deleting messages: {e}")
+            return []
 
     def get_message_count(self, chat_id: int) -> int:
         try:
@@ -201,6 +257,7 @@ class ChatRepository:
             message_count = len(self.data[chat_key].get("messages", []))
             self.data[chat_key]["messages"] = []
             self._save_data()
+            self.rendered.invalidate(chat_id)
             
             logger.info(f"Cleared {message_count} messages from chat {chat_id}")
             return True
@@ -260,6 +317,143 @@ class ChatRepository:
             logger.error(f"Error setting cron: {e}")
             return False
 
+    def get_chat_digest_size(self, chat_id: int) -> int:
+        try:
+            chat_key = str(chat_id)
+            if chat_key in self.data:
+                return self.data[chat_key].get("digest_size", 1)
+            return 1
+        except Exception as e:
+            logger.error(f"Error getting digest size: {e}")
+            return 1
+
+    def set_chat_digest_size(self, chat_id: int, digest_size: int) -> bool:
+        try:
+            chat_key = str(chat_id)
+
+            self._ensure_chat_data(chat_id)
+            self.data[chat_key]["digest_size"] = digest_size
+            self._save_data()
+
+            logger.info(f"Set digest size for chat {chat_id} to {digest_size}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error setting digest size: {e}")
+            return False
+
+    def enqueue_reminder(self, chat_id: int, slot: datetime) -> bool:
+        """Queue the reminder for a cron slot; a newer slot replaces the chat's pending one. Returns False if nothing changed."""
+        try:
+            chat_key = str(chat_id)
+
+            self._ensure_chat_data(chat_id)
+            chat_data = self.data[chat_key]
+            outbox = chat_data.setdefault("outbox", [])
+            slot_str = slot.strftime(DATETIME_FORMAT)
+            key = f"{chat_key}:{slot_str}"
+
+            last_reminder = self.get_last_reminder_datetime(chat_id)
+            if last_reminder and slot <= last_reminder:
+                return False
+
+            pending = max(outbox, key=lambda entry: entry["slot"], default=None)
+            if pending and slot_str <= pending["slot"]:
+                return False
+
+            # Keep the pending entry's retry schedule so an outage doesn't reset its backoff
+            chat_data["outbox"] = [{
+                "key": key,
+                "slot": slot_str,
+                "attempts": pending["attempts"] if pending else 0,
+                "next_attempt_at": pending["next_attempt_at"] if pending else slot_str
+            }]
+            self._save_data()
+
+            logger.info(f"Queued reminder {key}" + (f", replacing {pending['key']}" if pending else ""))
+            return True
+
+        except Exception as e:
+            logger.error(f"Error queueing reminder: {e}")
+            return False
+
+    def get_due_outbox_entries(self, now: datetime) -> List[tuple]:
+        """Get (chat_id, entry) pairs for chats whose queued reminder is due."""
+        try:
+            now_str = now.strftime(DATETIME_FORMAT)
+            due = []
+            for chat_key, chat_data in self.data.items():
+                entry = max(chat_data.get("outbox", []), key=lambda entry: entry["slot"], default=None)
+                if entry and entry["next_attempt_at"] <= now_str:
+                    due.append((int(chat_key), dict(entry)))
+            return due
+        except Exception as e:
+            logger.error(f"Error getting due outbox entries: {e}")
+            return []
+
+    def get_outbox_size(self) -> int:
+        return sum(1 for chat_data in self.data.values() if chat_data.get("outbox"))
+
+    def complete_outbox_entry(self, chat_id: int, delivered: bool = True) -> bool:
+        """Remove the chat's queued reminder and advance last_reminder_datetime to its slot, in a single save."""
+        try:
+            chat_key = str(chat_id)
+            chat_data = self.data[chat_key]
+            entry = max(chat_data.get("outbox", []), key=lambda entry: entry["slot"], default=None)
+            if entry is None:
+                return False
+
+            chat_data["outbox"] = []
+            last_reminder = chat_data.get("last_reminder_datetime")
+            if not last_reminder or entry["slot"] > last_reminder:
+                chat_data["last_reminder_datetime"] = entry["slot"]
+            self._save_data()
+
+            logger.info(f"{'Delivered' if delivered else 'Gave up on'} reminder {entry['key']}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error completing outbox entry: {e}")
+            return False
+
+    def reschedule_outbox_entry(self, chat_id: int, next_attempt_at: datetime) -> bool:
+        try:
+            chat_key = str(chat_id)
+            outbox = self.data[chat_key].get("outbox", [])
+            if not outbox:
+                return False
+
+            entry = max(outbox, key=lambda entry: entry["slot"])
+            entry["attempts"] += 1
+            entry["next_attempt_at"] = next_attempt_at.strftime(DATETIME_FORMAT)
+            self.data[chat_key]["outbox"] = [entry]
+            self._save_data()
+            return True
+
+        except Exception as e:
+            logger.error(f"Error rescheduling outbox entry: {e}")
+            return False
+
+    def update_outbox_delivery(self, chat_id: int, key: str, messages: List[str], sent_parts: int) -> bool:
+        """Record the messages picked for queued reminder `key` and how many of its parts were sent.
+
+        Does nothing if `key` was replaced by a newer slot meanwhile, so its progress doesn't leak into that one.
+        """
+        try:
+            outbox = self.data[str(chat_id)].get("outbox", [])
+            entry = max(outbox, key=lambda entry: entry["slot"], default=None)
+            if entry is None or entry["key"] != key:
+                return False
+
+            entry["messages"] = messages
+            entry["sent_parts"] = sent_parts
+            self._save_data()
+            return True
+
+        except Exception as e:
+            logger.error(f"Error updating outbox delivery: {e}")
+            return False
+
 
 def get_messages_file_path():
     """Get the messages file path from environment or default location."""
@@ -275,5 +469,7 @@ def get_messages_file_path():
     
     return str(data_dir / "messages.json")
 
-MESSAGES_FILE = get_messages_file_path()
-storage = ChatRepository(MESSAGES_FILE)
\ No newline at end of file
+
+def get_storage(context) -> ChatRepository:
+    """Get the repository injected into bot_data (accepts a CallbackContext or an Application)."""
+    return context.bot_data[STORAGE_KEY]
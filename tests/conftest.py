@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# The bot runs from src/, so its modules import each other as top-level packages
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from storage.chat_repository import ChatRepository, STORAGE_KEY  # noqa: E402
+
+
+class FakeBot:
+    """Records sent messages; raises `error`, or the next item of `errors`, instead of sending."""
+
+    def __init__(self):
+        self.error = None
+        self.errors = []
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors:
+            error = self.errors.pop(0)
+            if error:
+                raise error
+        elif self.error:
+            raise self.error
+        self.sent.append((chat_id, text, kwargs.get("parse_mode")))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = ChatRepository(str(tmp_path / "messages.json"))
+    storage.load()
+    return storage
+
+
+@pytest.fixture
+def fake_bot():
+    return FakeBot()
+
+
+@pytest.fixture
+def application(storage, fake_bot):
+    """Stands in for telegram.ext.Application: a bot, bot_data with the repository, and create_task."""
+    return types.SimpleNamespace(
+        bot=fake_bot,
+        bot_data={STORAGE_KEY: storage},
+        create_task=lambda coroutine: asyncio.get_running_loop().create_task(coroutine),
+    )
+
+
+@pytest.fixture
+def make_update():
+    """Build a fake text-message update; replies are recorded on update.message.replies."""
+    def make(chat_id: int, text: str, user_id=None):
+        replies = []
+
+        async def reply_text(reply, **kwargs):
+            replies.append(reply)
+
+        return types.SimpleNamespace(
+            effective_chat=types.SimpleNamespace(id=chat_id),
+            effective_user=types.SimpleNamespace(id=chat_id if user_id is None else user_id),
+            message=types.SimpleNamespace(text=text, reply_text=reply_text, replies=replies),
+        )
+
+    return make
@@ -0,0 +1,16 @@
+CHAT_ID = 5
+
+
+def test_random_messages_are_distinct_and_capped_at_what_is_stored(storage):
+    storage.store_messages(CHAT_ID, ["a", "b", "c"])
+
+    picked = storage.get_random_messages(CHAT_ID, 2)
+    assert len(picked) == 2
+    assert len(set(picked)) == 2
+    assert set(picked) <= {"a", "b", "c"}
+
+    assert sorted(storage.get_random_messages(CHAT_ID, 10)) == ["a", "b", "c"]
+
+
+def test_random_messages_of_an_unknown_chat_are_empty(storage):
+    assert storage.get_random_messages(CHAT_ID, 3) == []
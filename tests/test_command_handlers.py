@@ -0,0 +1,45 @@
+import asyncio
+import types
+
+import pytest
+
+pytest.importorskip("telegram")
+
+from handlers.command_handlers import MAX_DIGEST_SIZE, digest_command
+
+CHAT_ID = 9
+
+
+@pytest.fixture(autouse=True)
+def authorized(monkeypatch):
+    monkeypatch.setenv("AUTHORIZED_USER_IDS", str(CHAT_ID))
+
+
+def run_digest(application, make_update, *args):
+    update = make_update(CHAT_ID, "/digest " + " ".join(args))
+    context = types.SimpleNamespace(args=list(args), bot_data=application.bot_data, application=application)
+    asyncio.run(digest_command(update, context))
+    return update.message.replies
+
+
+def test_digest_sets_and_shows_the_size(storage, application, make_update):
+    assert run_digest(application, make_update, "5") == ["✅ Each scheduled reminder will now send 5 messages."]
+    assert storage.get_chat_digest_size(CHAT_ID) == 5
+
+    reply, = run_digest(application, make_update)
+    assert reply.startswith("📬 Each scheduled reminder sends 5 message(s).")
+
+
+@pytest.mark.parametrize("arg", ["0", str(MAX_DIGEST_SIZE + 1), "many"])
+def test_digest_rejects_invalid_sizes(storage, application, make_update, arg):
+    reply, = run_digest(application, make_update, arg)
+
+    assert reply.startswith("❌ Invalid digest size!")
+    assert storage.get_chat_digest_size(CHAT_ID) == 1
+
+
+def test_digest_ignores_unauthorized_users(storage, application, make_update, monkeypatch):
+    monkeypatch.setenv("AUTHORIZED_USER_IDS", "1")
+
+    assert run_digest(application, make_update, "5") == []
+    assert storage.get_chat_digest_size(CHAT_ID) == 1
@@ -0,0 +1,53 @@
+"""Fails when importing the bot's modules gets slower than the startup budget."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Same budget bot.py warns about at startup
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+
+IMPORT_SCRIPT = """
+import sys
+import time
+
+started = time.perf_counter()
+import storage.chat_repository
+import handlers.command_handlers
+import handlers.message_handlers
+import handlers.schedule_handlers
+import helpers.outbox
+elapsed_ms = (time.perf_counter() - started) * 1000
+
+print(elapsed_ms)
+print("pyslop.cronslator" in sys.modules)
+"""
+
+
+def test_handler_imports_stay_within_budget(tmp_path):
+    pytest.importorskip("telegram")
+    pytest.importorskip("croniter")
+
+    # A fresh interpreter so nothing is already cached in sys.modules
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=SRC_DIR,
+        env={**os.environ, "MESSAGES_FILE": str(tmp_path / "messages.json")},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed_ms, cronslator_imported = result.stdout.split()
+
+    assert float(elapsed_ms) < IMPORT_TIME_BUDGET_MS, (
+        f"Imports took {float(elapsed_ms):.1f}ms, over the {IMPORT_TIME_BUDGET_MS:.0f}ms budget"
+    )
+    # Only /schedule needs it, so it must not be imported eagerly
+    assert cronslator_imported == "False"
+    # The repository must not touch the data file until main() loads it
+    assert not (tmp_path / "messages.json").exists()
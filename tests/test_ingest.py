@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("telegram")
+
+from storage.chat_repository import ChatRepository
+from helpers.ingest import IngestController, ACCEPTED, DEFERRED, CHAT_BURST, USER_BURST
+
+
+def test_flush_all_stores_pending_and_backlogged_messages(storage, application, make_update):
+    async def burst_then_stop():
+        controller = IngestController(application)
+
+        # More than the buckets allow, so part of it is backlogged
+        results = [controller.submit(make_update(1, f"message {i}")) for i in range(USER_BURST + 20)]
+        assert results.count(ACCEPTED) == min(CHAT_BURST, USER_BURST)
+        assert results.count(DEFERRED) == 20
+
+        await controller.flush_all()
+        return controller
+
+    controller = asyncio.run(burst_then_stop())
+
+    assert storage.get_message_count(1) == USER_BURST + 20
+    assert not controller.pending and not controller.backlog
+
+    # The data reached the file, not just memory
+    reloaded = ChatRepository(storage.json_file)
+    reloaded.load()
+    assert reloaded.get_message_count(1) == USER_BURST + 20
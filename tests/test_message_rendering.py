@@ -0,0 +1,94 @@
+from helpers.message_rendering import (
+    DIGEST_HEADER,
+    RenderedMessageCache,
+    TELEGRAM_MESSAGE_LIMIT,
+    escape_html,
+    html_to_plain,
+    render_plain_reminder,
+    split_digest,
+    telegram_length,
+)
+
+
+def test_escape_html_escapes_markup_but_not_quotes():
+    assert escape_html('<b>a & "b"</b>') == '&lt;b&gt;a &amp; "b"&lt;/b&gt;'
+    assert escape_html("*unbalanced _markdown") == "*unbalanced _markdown"
+
+
+def test_html_to_plain_restores_user_text():
+    cache = RenderedMessageCache()
+    payload = cache.get_reminder_payload(1, "a < b & <i>c</i>")
+    assert html_to_plain(payload) == '💭 Random Reminder\n\n"a < b & <i>c</i>"'
+
+
+def test_reminder_payload_is_rendered_once_per_message():
+    cache = RenderedMessageCache()
+    first = cache.get_reminder_payload(1, "hello <world>")
+    assert first == '💭 <b>Random Reminder</b>\n\n"hello &lt;world&gt;"'
+    assert cache.get_reminder_payload(1, "hello <world>") is first
+
+
+def test_invalidate_drops_one_message_or_a_whole_chat():
+    cache = RenderedMessageCache()
+    kept = cache.get_reminder_payload(1, "kept")
+    dropped = cache.get_reminder_payload(1, "dropped")
+    other_chat = cache.get_reminder_payload(2, "other")
+
+    cache.invalidate(1, "dropped")
+    assert cache.get_reminder_payload(1, "kept") is kept
+    assert cache.get_reminder_payload(1, "dropped") is not dropped
+
+    cache.invalidate(1)
+    assert cache.get_reminder_payload(1, "kept") is not kept
+    assert cache.get_reminder_payload(2, "other") is other_chat
+
+
+def test_counts_sends_that_would_have_broken_markdown():
+    cache = RenderedMessageCache()
+    cache.get_reminder_payload(1, "balanced *bold*")
+    assert cache.parse_failures_avoided == 0
+
+    cache.get_reminder_payload(1, "snake_case")
+    cache.get_reminder_payload(1, "snake_case")
+    cache.get_reminder_payload(1, "[link")
+    assert cache.parse_failures_avoided == 3
+
+
+def test_long_reminder_is_cut_to_one_message_without_splitting_entities():
+    cache = RenderedMessageCache()
+    payload = cache.get_reminder_payload(1, "&" * 6000)
+
+    assert telegram_length(payload) <= TELEGRAM_MESSAGE_LIMIT
+    assert payload.endswith('&amp;…"')
+
+
+def test_long_plain_reminder_fits_and_counts_utf16_units():
+    plain = render_plain_reminder("😀" * 3000)
+
+    assert telegram_length(plain) <= TELEGRAM_MESSAGE_LIMIT
+    assert plain.endswith('😀…"')
+
+
+def test_digest_items_share_a_message_until_the_limit():
+    chunks = split_digest(["one", "two", "x" * 50], limit=telegram_length(DIGEST_HEADER) + 20)
+
+    assert chunks == [
+        DIGEST_HEADER + '"one"\n\n"two"',
+        DIGEST_HEADER + '"' + "x" * 17 + '…"',
+    ]
+
+
+def test_oversized_digest_item_is_cut_but_keeps_its_closing_quote():
+    chunks = split_digest(["short", escape_html("&" * 6000)])
+
+    assert chunks[0] == DIGEST_HEADER + '"short"'
+    assert telegram_length(chunks[1]) <= TELEGRAM_MESSAGE_LIMIT
+    assert chunks[1].endswith('&amp;…"')
+
+
+def test_digest_limit_counts_utf16_units():
+    chunks = split_digest(["😀" * 3000, "😀" * 3000])
+
+    assert len(chunks) == 2
+    assert all(telegram_length(chunk) <= TELEGRAM_MESSAGE_LIMIT for chunk in chunks)
+    assert all(chunk.endswith('😀…"') for chunk in chunks)
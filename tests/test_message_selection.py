@@ -0,0 +1,27 @@
+import pytest
+
+from helpers.message_selection import parse_id_selection
+
+
+@pytest.mark.parametrize("selection, expected", [
+    ("3", [(3, 3)]),
+    ("3-40,55", [(3, 40), (55, 55)]),
+    ("40-3", [(3, 40)]),
+    ("3 4", [(3, 3), (4, 4)]),
+    ("12 3-4", [(12, 12), (3, 4)]),
+    ("1 - 5", [(1, 5)]),
+    ("1 , 2", [(1, 1), (2, 2)]),
+])
+def test_parses_ids_and_ranges(selection, expected):
+    assert parse_id_selection(selection).ranges == expected
+
+
+@pytest.mark.parametrize("selection", ["hello", "3,,4", "3,", "-3", "1-2-3", "3 abc"])
+def test_rejects_anything_else(selection):
+    assert parse_id_selection(selection) is None
+
+
+def test_membership_does_not_expand_ranges():
+    ranges = parse_id_selection("1-1000000000,5")
+    assert 999999999 in ranges
+    assert 1000000001 not in ranges
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("telegram")
+
+from telegram.error import Forbidden, NetworkError
+
+from helpers.outbox import drain_outbox
+
+CHAT_ID = 42
+
+
+@pytest.fixture(autouse=True)
+def stored_message(storage):
+    storage.store_messages(CHAT_ID, ["remember this"])
+
+
+def make_due(storage):
+    # Pretend every queued attempt is due now
+    for entry in storage.data[str(CHAT_ID)]["outbox"]:
+        entry["next_attempt_at"] = "2000-01-01 00:00:00"
+
+
+def test_outage_keeps_one_pending_reminder(storage, application):
+    application.bot.error = NetworkError("down")
+    start = datetime(2026, 1, 1, 9, 0)
+
+    # A minutely cron that keeps firing through a 10 minute outage
+    for minute in range(10):
+        storage.enqueue_reminder(CHAT_ID, start + timedelta(minutes=minute))
+        make_due(storage)
+        asyncio.run(drain_outbox(application))
+
+    outbox = storage.data[str(CHAT_ID)]["outbox"]
+    assert len(outbox) == 1
+    assert outbox[0]["slot"] == "2026-01-01 09:09:00"
+
+    application.bot.error = None
+    make_due(storage)
+    asyncio.run(drain_outbox(application))
+
+    assert len(application.bot.sent) == 1
+    assert storage.data[str(CHAT_ID)]["outbox"] == []
+    assert storage.get_last_reminder_datetime(CHAT_ID) == start + timedelta(minutes=9)
+
+
+def test_delivered_slot_is_not_queued_again(storage, application):
+    slot = datetime(2026, 1, 1, 9, 0)
+    assert storage.enqueue_reminder(CHAT_ID, slot)
+    assert not storage.enqueue_reminder(CHAT_ID, slot)
+
+    make_due(storage)
+    asyncio.run(drain_outbox(application))
+
+    assert not storage.enqueue_reminder(CHAT_ID, slot)
+    assert len(application.bot.sent) == 1
+
+
+def test_blocked_bot_is_not_retried(storage, application):
+    application.bot.error = Forbidden("Forbidden: bot was blocked by the user")
+    slot = datetime(2026, 1, 1, 9, 0)
+    storage.enqueue_reminder(CHAT_ID, slot)
+    make_due(storage)
+
+    asyncio.run(drain_outbox(application))
+
+    assert storage.data[str(CHAT_ID)]["outbox"] == []
+    assert storage.get_last_reminder_datetime(CHAT_ID) == slot
+
+
+def test_temporary_failure_is_rescheduled(storage, application):
+    application.bot.error = NetworkError("timed out")
+    storage.enqueue_reminder(CHAT_ID, datetime(2026, 1, 1, 9, 0))
+    make_due(storage)
+
+    asyncio.run(drain_outbox(application))
+
+    outbox = storage.data[str(CHAT_ID)]["outbox"]
+    assert len(outbox) == 1
+    assert outbox[0]["attempts"] == 1
+    assert outbox[0]["next_attempt_at"] > datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def test_digest_retry_resends_only_the_missing_parts(storage, application):
+    # Each message fills most of a Telegram message, so every item is its own part
+    storage.store_messages(CHAT_ID, [letter * 3000 for letter in "abc"])
+    storage.set_chat_digest_size(CHAT_ID, 4)
+    application.bot.errors = [None, NetworkError("timed out")]
+    storage.enqueue_reminder(CHAT_ID, datetime(2026, 1, 1, 9, 0))
+    make_due(storage)
+
+    asyncio.run(drain_outbox(application))
+
+    assert len(application.bot.sent) == 1
+    picked = storage.data[str(CHAT_ID)]["outbox"][0]["messages"]
+
+    make_due(storage)
+    asyncio.run(drain_outbox(application))
+
+    sent = [text for _, text, _ in application.bot.sent]
+    assert len(sent) == 3
+    assert len(set(sent)) == 3
+    # The retry finished the digest it started instead of picking new messages
+    for message in picked:
+        assert sum(f'"{message}"' in text for text in sent) == 1
+    assert storage.data[str(CHAT_ID)]["outbox"] == []
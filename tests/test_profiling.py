@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+
+from helpers.profiling import LoopLagWatchdog, SamplingProfiler, get_active_handlers, tracking_handler
+
+FOLDED_LINE = re.compile(r"^\S.* \d+$")
+
+
+def busy_wait(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampling_profiler_outputs_folded_stacks():
+    profiler = SamplingProfiler(threading.get_ident(), interval=0.001)
+    profiler.start()
+    busy_wait(0.2)
+    dump = profiler.stop()
+
+    lines = dump.splitlines()
+    assert lines
+    assert all(FOLDED_LINE.match(line) for line in lines)
+    # Root-first frames joined by ";", with the sampled function as a leaf
+    assert any(";" in line and "busy_wait" in line.rsplit(";", 1)[-1] for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sum(profiler.samples.values())
+
+
+def test_tracking_handler_registers_and_removes_entry():
+    async def handler():
+        with tracking_handler("list_command"):
+            assert get_active_handlers() == ["list_command"]
+        return get_active_handlers()
+
+    assert asyncio.run(handler()) == []
+
+
+def test_loop_lag_watchdog_logs_once_per_stall(caplog):
+    async def blocking_handler():
+        with tracking_handler("blocking_handler"):
+            time.sleep(0.4)
+
+    async def run():
+        watchdog = LoopLagWatchdog(threshold_ms=50)
+        watchdog.start()
+        try:
+            await asyncio.sleep(0.1)
+            await blocking_handler()
+            await asyncio.sleep(0.2)
+        finally:
+            watchdog.stop()
+
+    with caplog.at_level(logging.WARNING, logger="bot"):
+        asyncio.run(run())
+
+    warnings = [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "handlers: blocking_handler" in warnings[0]
+    assert "in blocking_handler" in warnings[0]
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("telegram")
+
+from telegram.error import BadRequest, NetworkError
+
+from helpers.message_rendering import TELEGRAM_MESSAGE_LIMIT, telegram_length
+from helpers.reminder_utils import send_html_with_fallback, send_random_reminder
+
+CHAT_ID = 7
+
+
+def test_sends_html_when_accepted(fake_bot):
+    asyncio.run(send_html_with_fallback(fake_bot, CHAT_ID, "<b>hi</b>", "hi"))
+
+    assert fake_bot.sent == [(CHAT_ID, "<b>hi</b>", "HTML")]
+
+
+def test_falls_back_to_plain_text_when_markup_is_rejected(fake_bot):
+    fake_bot.errors = [BadRequest("Can't parse entities"), None]
+
+    asyncio.run(send_html_with_fallback(fake_bot, CHAT_ID, "<b>hi", "hi"))
+
+    assert fake_bot.sent == [(CHAT_ID, "hi", None)]
+
+
+def test_reraises_without_plain_text_or_for_other_errors(fake_bot):
+    fake_bot.error = BadRequest("Can't parse entities")
+    with pytest.raises(BadRequest):
+        asyncio.run(send_html_with_fallback(fake_bot, CHAT_ID, "<b>hi"))
+
+    fake_bot.error = NetworkError("down")
+    with pytest.raises(NetworkError):
+        asyncio.run(send_html_with_fallback(fake_bot, CHAT_ID, "<b>hi</b>", "hi"))
+    assert fake_bot.sent == []
+
+
+def test_long_message_is_sent_as_one_reminder(storage, application, fake_bot):
+    storage.store_messages(CHAT_ID, ["x" * 5000])
+
+    assert asyncio.run(send_random_reminder(CHAT_ID, application))
+
+    (_, text, parse_mode), = fake_bot.sent
+    assert parse_mode == "HTML"
+    assert telegram_length(text) <= TELEGRAM_MESSAGE_LIMIT